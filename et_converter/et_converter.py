@@ -6,6 +6,7 @@ import sys
 import traceback
 
 from logging import FileHandler
+from google.protobuf.internal import api_implementation
 from .text2chakra_converter import Text2ChakraConverter
 from .flexflow2chakra_converter import FlexFlow2ChakraConverter
 from .pytorch2chakra_converter import PyTorch2ChakraConverter
@@ -93,6 +94,12 @@ def main() -> None:
 
     logger = get_logger(args.log_filename)
     logger.debug(" ".join(sys.argv))
+    backend = api_implementation.Type()
+    logger.debug("protobuf backend: %s", backend)
+    if backend == "python":
+        logger.warning("protobuf is running on its pure-Python backend, "
+                       "conversion will be slow; use protobuf>=4 without "
+                       "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python for upb")
 
     try:
         if args.input_type == "Text":
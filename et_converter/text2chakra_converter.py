@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
 import logging
+import shutil
 
-from io import TextIOWrapper
-from typing import Any, List
+from functools import partial
+from io import BytesIO, TextIOWrapper
+from typing import Any, Callable, List
 from chakra.third_party.utils.protolib import encodeMessage as encode_message
 from chakra.et_def.et_def_pb2 import (
     NodeType,
@@ -18,42 +20,64 @@ from chakra.et_def.et_def_pb2 import (
     GlobalMetadata
 )
 
+COMM_TYPES = {
+    "ALLREDUCE": ALL_REDUCE,
+    "ALLTOALL": ALL_TO_ALL,
+    "ALLGATHER": ALL_GATHER,
+    "REDUCESCATTER": REDUCE_SCATTER,
+}
+
+# Layer types of the custom parallelism, see convert_custom_paralell
+FP, FP_IG, FP_WG, FP_IG_WG = range(4)
+LAYER_TYPE_NAMES = ("FP", "FP+IG", "FP+WG", "FP+IG+WG")
+
 class Layer:
+    __slots__ = (
+        "name", "is_trainable",
+        "fwd_comp_time", "fwd_comm_type", "fwd_comm_type_enum", "fwd_comm_size",
+        "fwd_comp_node_name", "fwd_comm_node_name",
+        "bwd_ig_comp_time", "bwd_ig_comm_type", "bwd_ig_comm_type_enum", "bwd_ig_comm_size",
+        "bwd_ig_comp_node_name", "bwd_ig_comm_node_name",
+        "bwd_wg_comp_time", "bwd_wg_comm_type", "bwd_wg_comm_type_enum", "bwd_wg_comm_size",
+        "bwd_wg_update_time", "bwd_wg_comp_node_name", "bwd_wg_comm_node_name",
+    )
+
     def __init__(
         self,
-        line: str
+        col: List[str]
     ) -> None:
         try:
-            col = line.strip().split()
             self.name = col[0]
 
             # Second rolumn (reserved) variable is used to indicate layer is trainable (>0)
             self.is_trainable = int(col[1]) > 0  ## Modified chakra trace format
-            print(f"[DEBUG] (Text2Chakra) {self.is_trainable}")
 
             # forward
             self.fwd_comp_time = int(col[2])
             self.fwd_comm_type = str(col[3])
+            self.fwd_comm_type_enum = COMM_TYPES.get(self.fwd_comm_type, 0)
             self.fwd_comm_size = int(col[4])
-            self.fwd_comp_node = None
-            self.fwd_comm_node = None
+            self.fwd_comp_node_name = f"COMP_NODE_{self.name}_FWD"
+            self.fwd_comm_node_name = f"COMM_COLL_NODE_{self.name}_{self.fwd_comm_type}"
 
             # backward input gradient
             self.bwd_ig_comp_time = int(col[5])
             self.bwd_ig_comm_type = str(col[6])
+            self.bwd_ig_comm_type_enum = COMM_TYPES.get(self.bwd_ig_comm_type, 0)
             self.bwd_ig_comm_size = int(col[7])
-            self.bwd_ig_comp_node = None
-            self.bwd_ig_comm_node = None
+            self.bwd_ig_comp_node_name = f"COMP_NODE_{self.name}_BWD_IG"
+            self.bwd_ig_comm_node_name = f"COMM_COLL_NODE_{self.name}_{self.bwd_ig_comm_type}"
 
             # backward weight gradient
             self.bwd_wg_comp_time = int(col[8])
             self.bwd_wg_comm_type = str(col[9])
+            self.bwd_wg_comm_type_enum = COMM_TYPES.get(self.bwd_wg_comm_type, 0)
             self.bwd_wg_comm_size = int(col[10])
             self.bwd_wg_update_time = str(col[11])
-            self.bwd_wg_comp_node = None
-            self.bwd_wg_comm_node = None
+            self.bwd_wg_comp_node_name = f"COMP_NODE_{self.name}_BWD_WG"
+            self.bwd_wg_comm_node_name = f"COMM_COLL_NODE_{self.name}_{self.bwd_wg_comm_type}"
         except Exception:
-            raise ValueError(f"Cannot parse the following layer -- \"{line}\"")
+            raise ValueError(f"Cannot parse the following layer -- \"{' '.join(col)}\"")
 
 class Text2ChakraConverter:
     def __init__(
@@ -89,10 +113,15 @@ class Text2ChakraConverter:
         f: TextIOWrapper,
         num_layers: int
     ) -> List[Layer]:
-        layers = []
-        for line in f:
-            layers.append(Layer(line))
-        return layers
+        # Read the remaining rows in one go; each row is still split on its
+        # own so a malformed row cannot shift the columns of the rows after it.
+        rows = [col for col in map(str.split, f.read().splitlines()) if col]
+        if len(rows) < num_layers:
+            raise ValueError(f"Expected {num_layers} layers, got {len(rows)}")
+        if len(rows) > num_layers:
+            self.logger.warning("Ignoring %d rows past the %d declared layers",
+                                len(rows) - num_layers, num_layers)
+        return [Layer(col) for col in rows[:num_layers]]
 
     def get_node(
         self,
@@ -108,49 +137,60 @@ class Text2ChakraConverter:
 
     def get_comp_node(
         self,
-        layer_name: str,
-        phase: str,
+        name: str,
         comp_time: int
     ) -> Any:
-        node = self.get_node("COMP_NODE_" + layer_name + "_" + phase,
-                             COMP_NODE)
+        node = self.get_node(name, COMP_NODE)
         node.duration_micros = comp_time
         return node
 
-    def get_comm_type(
-        self,
-        comm_type: str
-    ) -> int:
-        if comm_type == "ALLREDUCE":
-            return ALL_REDUCE
-        elif comm_type == "ALLTOALL":
-            return ALL_TO_ALL
-        elif comm_type == "ALLGATHER":
-            return ALL_GATHER
-        elif comm_type == "REDUCESCATTER":
-            return REDUCE_SCATTER
-        return 0
-
     def get_comm_coll_node(
         self,
-        layer_name: str,
-        comm_type: str,
+        name: str,
+        comm_type: int,
         comm_size: int
     ) -> Any:
-        node = self.get_node(f"COMM_COLL_NODE_{layer_name}_{comm_type}",
-                             COMM_COLL_NODE)
-        node.attr.append(ChakraAttr(name="comm_type",
-                                    int64_val=self.get_comm_type(comm_type)))
-        node.attr.append(ChakraAttr(name="comm_size",
-                                    uint64_val=comm_size))
+        node = self.get_node(name, COMM_COLL_NODE)
+        node.attr.add(name="comm_type", int64_val=comm_type)
+        node.attr.add(name="comm_size", uint64_val=comm_size)
         return node
 
-    def add_parent(
+    def get_involved_dim_attr(
+        self,
+        involved_dim: List[bool]
+    ) -> Any:
+        attr = ChakraAttr(name="involved_dim")
+        attr.bool_list.values.extend(involved_dim)
+        return attr
+
+    def add_parents(
         self,
         child_node: Any,
-        parent_node: Any
+        *parent_nodes: Any
+    ) -> None:
+        child_node.data_deps.extend([parent_node.id for parent_node in parent_nodes])
+
+    def write_traces(
+        self,
+        layers: List[Layer],
+        emit_trace: Callable[[BytesIO, List[Layer]], None]
     ) -> None:
-        child_node.data_deps.append(parent_node.id)
+        if self.num_npus < 1:
+            return
+
+        # Nothing in a trace depends on the NPU ID, so every NPU gets the same
+        # trace. It is serialized once and the file is copied to the other NPUs;
+        # node IDs therefore start over in every file.
+        output_filenames = [f"{self.output_filename}.{npu_id}.et"
+                            for npu_id in range(self.num_npus)]
+        with BytesIO() as g:
+            encode_message(g, self.get_global_metadata())
+            emit_trace(g, layers)
+            with open(output_filenames[0], "wb") as out_file:
+                out_file.write(g.getbuffer())
+
+        for output_filename in output_filenames[1:]:
+            shutil.copyfile(output_filenames[0], output_filename)
 
     def convert(self) -> None:
         with open(self.input_filename, "r") as f:
@@ -158,24 +198,22 @@ class Text2ChakraConverter:
             parallelism_type = first_line[0]
             num_layers = int(f.readline().strip())
 
-            if parallelism_type == "MICRO":
-                self.convert_microbenchmark(f, num_layers)
-            elif parallelism_type == "DATA":
-                self.convert_data_parallel(f, num_layers)
-            elif parallelism_type == "MODEL":
-                self.convert_model_parallel(f, num_layers)
-            elif (parallelism_type == "HYBRID_DATA_MODEL"):
-                self.convert_hybrid_data_model(f, num_layers)
-            elif (parallelism_type == "HYBRID_MODEL_DATA"):
-                self.convert_hybrid_model_data(f, num_layers)
-            elif (parallelism_type == "CUSTOM"):
-                self.convert_custom_paralell(f, num_layers)
-            elif (parallelism_type == "HYBRID_DLRM")\
-                    or (parallelism_type == "HYBRID_DLRM_ENHANCED"):
+            if parallelism_type in ("HYBRID_DLRM", "HYBRID_DLRM_ENHANCED"):
                 last_bottom_layer = int(first_line[1])
                 self.convert_hybrid_dlrm(f, num_layers, last_bottom_layer)
-            else:
+                return
+
+            convert_funcs = {
+                "MICRO": self.convert_microbenchmark,
+                "DATA": self.convert_data_parallel,
+                "MODEL": self.convert_model_parallel,
+                "HYBRID_DATA_MODEL": self.convert_hybrid_data_model,
+                "HYBRID_MODEL_DATA": self.convert_hybrid_model_data,
+                "CUSTOM": self.convert_custom_paralell,
+            }
+            if parallelism_type not in convert_funcs:
                 raise ValueError(f"Unsupported parallelism type, {parallelism_type}")
+            convert_funcs[parallelism_type](f, num_layers)
 
     def convert_microbenchmark(
         self,
@@ -183,23 +221,23 @@ class Text2ChakraConverter:
         num_layers: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    for layer in layers:
-                        bwd_wg_comm_node = self.get_comm_coll_node(layer.name,
-                                                                   layer.bwd_wg_comm_type,
-                                                                   layer.bwd_wg_comm_size)
-
-                        attr = ChakraAttr(name="involved_dim")
-                        for _ in range(self.num_dims):
-                            attr.bool_list.values.append(True)
-                        bwd_wg_comm_node.attr.append(attr)
-
-                        encode_message(g, bwd_wg_comm_node)
+        self.write_traces(layers, self.emit_microbenchmark)
+
+    def emit_microbenchmark(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        all_dims_attr = self.get_involved_dim_attr([True] * self.num_dims)
+        for i in range(self.num_passes):
+            for layer in layers:
+                bwd_wg_comm_node = self.get_comm_coll_node(layer.bwd_wg_comm_node_name,
+                                                           layer.bwd_wg_comm_type_enum,
+                                                           layer.bwd_wg_comm_size)
+
+                bwd_wg_comm_node.attr.append(all_dims_attr)
+
+                encode_message(g, bwd_wg_comm_node)
 
     def convert_data_parallel(
         self,
@@ -207,60 +245,58 @@ class Text2ChakraConverter:
         num_layers: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    fwd_comp_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(layer.name, "FWD",
-                                                           layer.fwd_comp_time)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx - 1].fwd_comp_node)
-                        if layer.bwd_wg_comm_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comm_node)
-                        layer.fwd_comp_node = fwd_comp_node
-                        encode_message(g, fwd_comp_node)
-
-                    # backward pass
-                    for idx, layer in enumerate(reversed(layers)):
-                        bwd_wg_comp_node = self.get_comp_node(layer.name, "BWD_WG",
-                                                              layer.bwd_wg_comp_time)
-                        if idx == 0:
-                            if fwd_comp_node is None:
-                                raise ValueError("fwd_comp_node is None")
-                            self.add_parent(bwd_wg_comp_node, fwd_comp_node)
-                        else:
-                            self.add_parent(bwd_wg_comp_node,
-                                            layers[len(layers) - idx].bwd_ig_comp_node)
-                        encode_message(g, bwd_wg_comp_node)
-
-                        bwd_wg_comm_node = self.get_comm_coll_node(layer.name,
-                                                                   layer.bwd_wg_comm_type,
-                                                                   layer.bwd_wg_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        for _ in range(self.num_dims):
-                            attr.bool_list.values.append(True)
-                        bwd_wg_comm_node.attr.append(attr)
-
-                        self.add_parent(bwd_wg_comm_node, bwd_wg_comp_node)
-                        layer.bwd_wg_comm_node = bwd_wg_comm_node
-                        encode_message(g, bwd_wg_comm_node)
-
-                        if idx != (len(layers) - 1):
-                            bwd_ig_comp_node = self.get_comp_node(layer.name, "BWD_IG",
-                                                                  layer.bwd_ig_comp_time)
-                            self.add_parent(bwd_ig_comp_node, bwd_wg_comp_node)
-                            layer.bwd_ig_comp_node = bwd_ig_comp_node
-                            encode_message(g, bwd_ig_comp_node)
-
-                for layer in layers:
-                    layer.bwd_wg_comm_node = None
-                    
+        self.write_traces(layers, self.emit_data_parallel)
+
+    def emit_data_parallel(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        rev = layers[::-1]
+        bwd_wg_comm_nodes = [None] * len(layers)
+        all_dims_attr = self.get_involved_dim_attr([True] * self.num_dims)
+        for i in range(self.num_passes):
+            fwd_comp_node = None
+            bwd_ig_comp_node = None
+
+            # forward pass
+            for layer, bwd_wg_comm_node in zip(layers, bwd_wg_comm_nodes):
+                prev_fwd_comp_node = fwd_comp_node
+                fwd_comp_node = self.get_comp_node(layer.fwd_comp_node_name,
+                                                   layer.fwd_comp_time)
+                if prev_fwd_comp_node is not None:
+                    self.add_parents(fwd_comp_node, prev_fwd_comp_node)
+                if bwd_wg_comm_node is not None:
+                    self.add_parents(fwd_comp_node, bwd_wg_comm_node)
+                encode_message(g, fwd_comp_node)
+
+            # backward pass
+            for idx, layer in enumerate(rev):
+                bwd_wg_comp_node = self.get_comp_node(layer.bwd_wg_comp_node_name,
+                                                      layer.bwd_wg_comp_time)
+                if idx == 0:
+                    if fwd_comp_node is None:
+                        raise ValueError("fwd_comp_node is None")
+                    self.add_parents(bwd_wg_comp_node, fwd_comp_node)
+                else:
+                    self.add_parents(bwd_wg_comp_node, bwd_ig_comp_node)
+                encode_message(g, bwd_wg_comp_node)
+
+                bwd_wg_comm_node = self.get_comm_coll_node(layer.bwd_wg_comm_node_name,
+                                                           layer.bwd_wg_comm_type_enum,
+                                                           layer.bwd_wg_comm_size)
+                bwd_wg_comm_node.attr.append(all_dims_attr)
+
+                self.add_parents(bwd_wg_comm_node, bwd_wg_comp_node)
+                bwd_wg_comm_nodes[-1 - idx] = bwd_wg_comm_node
+                encode_message(g, bwd_wg_comm_node)
+
+                if idx != (len(layers) - 1):
+                    bwd_ig_comp_node = self.get_comp_node(layer.bwd_ig_comp_node_name,
+                                                          layer.bwd_ig_comp_time)
+                    self.add_parents(bwd_ig_comp_node, bwd_wg_comp_node)
+                    encode_message(g, bwd_ig_comp_node)
+
     def convert_custom_paralell(
         self,
         f: TextIOWrapper,
@@ -276,129 +312,115 @@ class Text2ChakraConverter:
         """
         self.layer_types = []
         layers = self.get_layers(f, num_layers)
-        print(layers, len(layers))
-        
-        for layer_id in range(num_layers):
-            has_trainable_underneath = False
-            for j in range(0, layer_id):
-                if layers[j].is_trainable:
-                    has_trainable_underneath = True
-                    break
-
-            if layers[layer_id].is_trainable:
+
+        has_trainable_underneath = False
+        for layer in layers:
+            if layer.is_trainable:
                 if has_trainable_underneath:
-                    self.layer_types.append("FP+IG+WG")
+                    self.layer_types.append(FP_IG_WG)
                 else:
-                    self.layer_types.append("FP+WG")
+                    self.layer_types.append(FP_WG)
+                has_trainable_underneath = True
             else:
                 if has_trainable_underneath:
-                    self.layer_types.append("FP+IG")
+                    self.layer_types.append(FP_IG)
                 else:
-                    self.layer_types.append("FP") 
-                
-        for i, type in enumerate(self.layer_types)           :
-            print(i, type)
+                    self.layer_types.append(FP)
+
+        for i, layer_type in enumerate(self.layer_types):
+            self.logger.debug("Layer %d type %s", i, LAYER_TYPE_NAMES[layer_type])
         #### #### ####
         ## TODO: add the assignment list effect
         #### #### ####
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                # Ensure chakra correctness
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                
-                for _ in range(self.num_passes):  # unused
-                    fwd_comp_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(
-                                layer.name, "FWD",
-                                layer.fwd_comp_time)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx-1].fwd_comp_node)
-                        # if layer.bwd_wg_comm_node != None:
-                        #     self.add_parent(fwd_comp_node, layer.bwd_wg_comm_node)
-                        layer.fwd_comp_node = fwd_comp_node
-                        encode_message(g, fwd_comp_node)
-                        
-                        print(f"[DEBUG] Add {fwd_comp_node}")
-                    
-                    prev_comp_node = None
-                    for idx, layer in enumerate(reversed(layers)):
-                        if (self.layer_types[idx] == "FP"):
-                            layer.bwd_ig_comp_node = None
-                            layer.bwd_wg_comp_node = None
-                            continue
-                            ## No backward
-                        elif (self.layer_types[idx] == "FP+IG"):
-                            wg_comp_node = None
-                            ig_comp_node = self.get_comp_node(
-                                layer.name, "BWD_IG",
-                                layer.bwd_ig_comp_time
-                            )
-                            if idx == 0:
-                                self.add_parent(ig_comp_node, fwd_comp_node)
-                            else:
-                                self.add_parent(ig_comp_node, prev_comp_node)
-                                
-                            prev_comp_node = ig_comp_node
-                            
-                            layer.bwd_ig_comp_node = ig_comp_node
-                            layer.bwd_wg_comp_node = None
-                            encode_message(g, ig_comp_node)
-                            
-                            print(f"[DEBUG] Add {ig_comp_node}")
-
-                        elif (self.layer_types[idx] == "FP+WG"):
-                            ig_comp_node = None
-                            wg_comp_node = self.get_comp_node(
-                                layer.name, "BWD_WG",
-                                layer.bwd_wg_comp_time
-                            )
-                            if idx == 0:
-                                self.add_parent(wg_comp_node, fwd_comp_node)
-                            else:
-                                self.add_parent(wg_comp_node, prev_comp_node)
-                                
-                            layer.bwd_ig_comp_node = None
-                            layer.bwd_wg_comp_node = wg_comp_node
-                            prev_comp_node = wg_comp_node
-                            
-                            encode_message(g, wg_comp_node)
-                            
-                            print(f"[DEBUG] Add {wg_comp_node}")
-                            
-                        elif (self.layer_types[idx] == "FP+IG+WG"):
-                            ig_comp_node = self.get_comp_node(
-                                layer.name, "BWD_IG",
-                                layer.bwd_ig_comp_time
-                            )
-                            wg_comp_node = self.get_comp_node(
-                                layer.name, "BWD_WG",
-                                layer.bwd_wg_comp_time
-                            )
-                            self.add_parent(ig_comp_node, wg_comp_node)
-                            if idx == 0:
-                                self.add_parent(wg_comp_node, fwd_comp_node)
-                            else:
-                                self.add_parent(wg_comp_node, prev_comp_node)
-                            
-                            prev_comp_node = ig_comp_node
-                            
-                            layer.bwd_ig_comp_node = ig_comp_node
-                            layer.bwd_wg_comp_node = wg_comp_node
-                            
-                            encode_message(g, ig_comp_node)
-                            encode_message(g, wg_comp_node)
-                            
-                            print(f"[DEBUG] Add {ig_comp_node}")
-                            print(f"[DEBUG] Add {wg_comp_node}")
-                        else:
-                            raise RuntimeError("Unknown compute type:", self.layer_types[idx])
-                # for layer in layers:
-                #     layer.bwd_wg_comp_node = None
+        self.write_traces(layers, self.emit_custom_paralell)
+
+    def emit_custom_paralell(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        fwd_comp_nodes = [None] * len(layers)
+        for _ in range(self.num_passes):  # unused
+            fwd_comp_node = None
+
+            # forward pass
+            for idx, layer in enumerate(layers):
+                fwd_comp_node = self.get_comp_node(
+                        layer.fwd_comp_node_name,
+                        layer.fwd_comp_time)
+                if idx != 0:
+                    self.add_parents(fwd_comp_node, fwd_comp_nodes[idx - 1])
+                # if layer.bwd_wg_comm_node != None:
+                #     self.add_parents(fwd_comp_node, layer.bwd_wg_comm_node)
+                fwd_comp_nodes[idx] = fwd_comp_node
+                encode_message(g, fwd_comp_node)
+
+                self.logger.debug("Add node id=%d", fwd_comp_node.id)
+
+            prev_comp_node = None
+            for idx, layer in enumerate(reversed(layers)):
+                layer_type = self.layer_types[idx]
+                if (layer_type == FP):
+                    continue
+                    ## No backward
+                elif (layer_type == FP_IG):
+                    wg_comp_node = None
+                    ig_comp_node = self.get_comp_node(
+                        layer.bwd_ig_comp_node_name,
+                        layer.bwd_ig_comp_time
+                    )
+                    if idx == 0:
+                        self.add_parents(ig_comp_node, fwd_comp_node)
+                    else:
+                        self.add_parents(ig_comp_node, prev_comp_node)
+
+                    prev_comp_node = ig_comp_node
+
+                    encode_message(g, ig_comp_node)
+
+                    self.logger.debug("Add node id=%d", ig_comp_node.id)
+
+                elif (layer_type == FP_WG):
+                    ig_comp_node = None
+                    wg_comp_node = self.get_comp_node(
+                        layer.bwd_wg_comp_node_name,
+                        layer.bwd_wg_comp_time
+                    )
+                    if idx == 0:
+                        self.add_parents(wg_comp_node, fwd_comp_node)
+                    else:
+                        self.add_parents(wg_comp_node, prev_comp_node)
+
+                    prev_comp_node = wg_comp_node
+
+                    encode_message(g, wg_comp_node)
+
+                    self.logger.debug("Add node id=%d", wg_comp_node.id)
+
+                elif (layer_type == FP_IG_WG):
+                    ig_comp_node = self.get_comp_node(
+                        layer.bwd_ig_comp_node_name,
+                        layer.bwd_ig_comp_time
+                    )
+                    wg_comp_node = self.get_comp_node(
+                        layer.bwd_wg_comp_node_name,
+                        layer.bwd_wg_comp_time
+                    )
+                    self.add_parents(ig_comp_node, wg_comp_node)
+                    if idx == 0:
+                        self.add_parents(wg_comp_node, fwd_comp_node)
+                    else:
+                        self.add_parents(wg_comp_node, prev_comp_node)
+
+                    prev_comp_node = ig_comp_node
+
+                    encode_message(g, ig_comp_node)
+                    encode_message(g, wg_comp_node)
+
+                    self.logger.debug("Add node id=%d", ig_comp_node.id)
+                    self.logger.debug("Add node id=%d", wg_comp_node.id)
+                else:
+                    raise RuntimeError("Unknown compute type:", layer_type)
 
     def convert_model_parallel(
         self,
@@ -406,71 +428,65 @@ class Text2ChakraConverter:
         num_layers: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    fwd_comm_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(layer.name, "FWD",
-                                                           layer.fwd_comp_time)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx - 1].fwd_comm_node)
-                        if layer.bwd_wg_comp_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comp_node)
-                        layer.fwd_comp_node = fwd_comp_node
-                        encode_message(g, fwd_comp_node)
-
-                        fwd_comm_node = self.get_comm_coll_node(layer.name,
-                                                                layer.fwd_comm_type,
-                                                                layer.fwd_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        for _ in range(self.num_dims):
-                            attr.bool_list.values.append(True)
-                        fwd_comm_node.attr.append(attr)
-                        layer.fwd_comm_node = fwd_comm_node
-                        self.add_parent(fwd_comm_node, fwd_comp_node)
-                        encode_message(g, fwd_comm_node)
-
-                    # backward pass
-                    for idx, layer in enumerate(reversed(layers)):
-                        bwd_ig_comp_node = self.get_comp_node(layer.name, "BWD_IG",
-                                                              layer.bwd_ig_comp_time)
-                        if idx == 0:
-                            if fwd_comm_node is None:
-                                raise ValueError("fwd_comm_node is None")
-                            self.add_parent(bwd_ig_comp_node, fwd_comm_node)
-                        else:
-                            self.add_parent(bwd_ig_comp_node,
-                                            layers[len(layers) - idx].bwd_wg_comp_node)
-                            self.add_parent(bwd_ig_comp_node,
-                                            layers[len(layers) - idx].bwd_ig_comm_node)
-                        encode_message(g, bwd_ig_comp_node)
-
-                        if idx != (num_layers - 1):
-                            bwd_ig_comm_node = self.get_comm_coll_node(layer.name,
-                                                                       layer.bwd_ig_comm_type,
-                                                                       layer.bwd_ig_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            for _ in range(self.num_dims):
-                                attr.bool_list.values.append(True)
-                            bwd_ig_comm_node.attr.append(attr)
-                            self.add_parent(bwd_ig_comm_node, bwd_ig_comp_node)
-                            layer.bwd_ig_comm_node = bwd_ig_comm_node
-                            encode_message(g, bwd_ig_comm_node)
-
-                        bwd_wg_comp_node = self.get_comp_node(layer.name, "BWD_WG",
-                                                              layer.bwd_wg_comp_time)
-                        self.add_parent(bwd_wg_comp_node, bwd_ig_comp_node)
-                        layer.bwd_wg_comp_node = bwd_wg_comp_node
-                        encode_message(g, bwd_wg_comp_node)
-
-                for layer in layers:
-                    layer.bwd_wg_comp_node = None
+        self.write_traces(layers, self.emit_model_parallel)
+
+    def emit_model_parallel(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        rev = layers[::-1]
+        fwd_comm_nodes = [None] * len(layers)
+        bwd_wg_comp_nodes = [None] * len(layers)
+        all_dims_attr = self.get_involved_dim_attr([True] * self.num_dims)
+        for i in range(self.num_passes):
+            fwd_comm_node = None
+            bwd_ig_comm_node = None
+            bwd_wg_comp_node = None
+
+            # forward pass
+            for idx, layer in enumerate(layers):
+                fwd_comp_node = self.get_comp_node(layer.fwd_comp_node_name,
+                                                   layer.fwd_comp_time)
+                if idx != 0:
+                    self.add_parents(fwd_comp_node, fwd_comm_nodes[idx - 1])
+                if bwd_wg_comp_nodes[idx] is not None:
+                    self.add_parents(fwd_comp_node, bwd_wg_comp_nodes[idx])
+                encode_message(g, fwd_comp_node)
+
+                fwd_comm_node = self.get_comm_coll_node(layer.fwd_comm_node_name,
+                                                        layer.fwd_comm_type_enum,
+                                                        layer.fwd_comm_size)
+                fwd_comm_node.attr.append(all_dims_attr)
+                fwd_comm_nodes[idx] = fwd_comm_node
+                self.add_parents(fwd_comm_node, fwd_comp_node)
+                encode_message(g, fwd_comm_node)
+
+            # backward pass
+            for idx, layer in enumerate(rev):
+                bwd_ig_comp_node = self.get_comp_node(layer.bwd_ig_comp_node_name,
+                                                      layer.bwd_ig_comp_time)
+                if idx == 0:
+                    if fwd_comm_node is None:
+                        raise ValueError("fwd_comm_node is None")
+                    self.add_parents(bwd_ig_comp_node, fwd_comm_node)
+                else:
+                    self.add_parents(bwd_ig_comp_node, bwd_wg_comp_node, bwd_ig_comm_node)
+                encode_message(g, bwd_ig_comp_node)
+
+                if idx != (len(layers) - 1):
+                    bwd_ig_comm_node = self.get_comm_coll_node(layer.bwd_ig_comm_node_name,
+                                                               layer.bwd_ig_comm_type_enum,
+                                                               layer.bwd_ig_comm_size)
+                    bwd_ig_comm_node.attr.append(all_dims_attr)
+                    self.add_parents(bwd_ig_comm_node, bwd_ig_comp_node)
+                    encode_message(g, bwd_ig_comm_node)
+
+                bwd_wg_comp_node = self.get_comp_node(layer.bwd_wg_comp_node_name,
+                                                      layer.bwd_wg_comp_time)
+                self.add_parents(bwd_wg_comp_node, bwd_ig_comp_node)
+                bwd_wg_comp_nodes[-1 - idx] = bwd_wg_comp_node
+                encode_message(g, bwd_wg_comp_node)
 
     def convert_hybrid_data_model(
         self,
@@ -478,84 +494,75 @@ class Text2ChakraConverter:
         num_layers: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    fwd_comm_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(layer.name, "FWD",
-                                                           layer.fwd_comp_time)
-                        if layer.bwd_wg_comm_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comm_node)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx - 1].fwd_comm_node)
-                        encode_message(g, fwd_comp_node)
-
-                        fwd_comm_node = self.get_comm_coll_node(layer.name,
-                                                                layer.fwd_comm_type,
-                                                                layer.fwd_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        attr.bool_list.values.append(True)
-                        for _ in range(self.num_dims - 1):
-                            attr.bool_list.values.append(False)
-                        fwd_comm_node.attr.append(attr)
-                        self.add_parent(fwd_comm_node, fwd_comp_node)
-                        layer.fwd_comm_node = fwd_comm_node
-                        encode_message(g, fwd_comm_node)
-
-                    # backward pass
-                    for idx, layer in enumerate(reversed(layers)):
-                        bwd_ig_comp_node = self.get_comp_node(layer.name, "BWD_IG",
-                                                              layer.bwd_ig_comp_time)
-                        if idx == 0:
-                            if fwd_comm_node is None:
-                                raise ValueError("fwd_comm_node is None")
-                            self.add_parent(bwd_ig_comp_node, fwd_comm_node)
-                        else:
-                            self.add_parent(bwd_ig_comp_node,
-                                            layers[len(layers) - idx].bwd_wg_comp_node)
-                            self.add_parent(bwd_ig_comp_node,
-                                            layers[len(layers) - idx].bwd_ig_comm_node)
-                        encode_message(g, bwd_ig_comp_node)
-
-                        if idx != num_layers - 1:
-                            bwd_ig_comm_node = self.get_comm_coll_node(layer.name + "_IG_COMM_",
-                                                                       layer.bwd_ig_comm_type,
-                                                                       layer.bwd_ig_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            attr.bool_list.values.append(True)
-                            for _ in range(self.num_dims - 1):
-                                attr.bool_list.values.append(False)
-                            bwd_ig_comm_node.attr.append(attr)
-                            self.add_parent(bwd_ig_comm_node, bwd_ig_comp_node)
-                            layer.bwd_ig_comm_node = bwd_ig_comm_node
-                            encode_message(g, bwd_ig_comm_node)
-
-                        bwd_wg_comp_node = self.get_comp_node(layer.name, "BWD_WG",
-                                                              layer.bwd_wg_comp_time)
-                        self.add_parent(bwd_wg_comp_node, bwd_ig_comp_node)
-                        layer.bwd_wg_comp_node = bwd_wg_comp_node
-                        encode_message(g, bwd_wg_comp_node)
-
-                        bwd_wg_comm_node = self.get_comm_coll_node(layer.name,
-                                                                   layer.bwd_wg_comm_type,
-                                                                   layer.bwd_wg_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        attr.bool_list.values.append(False)
-                        for _ in range(self.num_dims - 1):
-                            attr.bool_list.values.append(True)
-                        bwd_wg_comm_node.attr.append(attr)
-                        self.add_parent(bwd_wg_comm_node, bwd_wg_comp_node)
-                        layer.bwd_wg_comm_node = bwd_wg_comm_node
-                        encode_message(g, bwd_wg_comm_node)
-
-                for layer in layers:
-                    layer.bwd_wg_comm_node = None
+        self.write_traces(layers, self.emit_hybrid_data_model)
+
+    def emit_hybrid_data_model(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        rev = layers[::-1]
+        fwd_comm_nodes = [None] * len(layers)
+        bwd_wg_comm_nodes = [None] * len(layers)
+        first_dim_attr = self.get_involved_dim_attr([True] + [False] * (self.num_dims - 1))
+        other_dims_attr = self.get_involved_dim_attr([False] + [True] * (self.num_dims - 1))
+        bwd_ig_comm_node_names = [f"COMM_COLL_NODE_{layer.name}_IG_COMM__{layer.bwd_ig_comm_type}"
+                                  for layer in rev]
+        for i in range(self.num_passes):
+            fwd_comm_node = None
+            bwd_ig_comm_node = None
+            bwd_wg_comp_node = None
+
+            # forward pass
+            for idx, layer in enumerate(layers):
+                fwd_comp_node = self.get_comp_node(layer.fwd_comp_node_name,
+                                                   layer.fwd_comp_time)
+                if bwd_wg_comm_nodes[idx] is not None:
+                    self.add_parents(fwd_comp_node, bwd_wg_comm_nodes[idx])
+                if idx != 0:
+                    self.add_parents(fwd_comp_node, fwd_comm_nodes[idx - 1])
+                encode_message(g, fwd_comp_node)
+
+                fwd_comm_node = self.get_comm_coll_node(layer.fwd_comm_node_name,
+                                                        layer.fwd_comm_type_enum,
+                                                        layer.fwd_comm_size)
+                fwd_comm_node.attr.append(first_dim_attr)
+                self.add_parents(fwd_comm_node, fwd_comp_node)
+                fwd_comm_nodes[idx] = fwd_comm_node
+                encode_message(g, fwd_comm_node)
+
+            # backward pass
+            for idx, layer in enumerate(rev):
+                bwd_ig_comp_node = self.get_comp_node(layer.bwd_ig_comp_node_name,
+                                                      layer.bwd_ig_comp_time)
+                if idx == 0:
+                    if fwd_comm_node is None:
+                        raise ValueError("fwd_comm_node is None")
+                    self.add_parents(bwd_ig_comp_node, fwd_comm_node)
+                else:
+                    self.add_parents(bwd_ig_comp_node, bwd_wg_comp_node, bwd_ig_comm_node)
+                encode_message(g, bwd_ig_comp_node)
+
+                if idx != (len(layers) - 1):
+                    bwd_ig_comm_node = self.get_comm_coll_node(bwd_ig_comm_node_names[idx],
+                                                               layer.bwd_ig_comm_type_enum,
+                                                               layer.bwd_ig_comm_size)
+                    bwd_ig_comm_node.attr.append(first_dim_attr)
+                    self.add_parents(bwd_ig_comm_node, bwd_ig_comp_node)
+                    encode_message(g, bwd_ig_comm_node)
+
+                bwd_wg_comp_node = self.get_comp_node(layer.bwd_wg_comp_node_name,
+                                                      layer.bwd_wg_comp_time)
+                self.add_parents(bwd_wg_comp_node, bwd_ig_comp_node)
+                encode_message(g, bwd_wg_comp_node)
+
+                bwd_wg_comm_node = self.get_comm_coll_node(layer.bwd_wg_comm_node_name,
+                                                           layer.bwd_wg_comm_type_enum,
+                                                           layer.bwd_wg_comm_size)
+                bwd_wg_comm_node.attr.append(other_dims_attr)
+                self.add_parents(bwd_wg_comm_node, bwd_wg_comp_node)
+                bwd_wg_comm_nodes[-1 - idx] = bwd_wg_comm_node
+                encode_message(g, bwd_wg_comm_node)
 
     def convert_hybrid_model_data(
         self,
@@ -563,82 +570,73 @@ class Text2ChakraConverter:
         num_layers: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    fwd_comm_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(layer.name, "FWD",
-                                                           layer.fwd_comp_time)
-                        if layer.bwd_wg_comm_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comm_node)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx - 1].fwd_comm_node)
-                        encode_message(g, fwd_comp_node)
-
-                        fwd_comm_node = self.get_comm_coll_node(layer.name,
-                                                                layer.fwd_comm_type,
-                                                                layer.fwd_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        attr.bool_list.values.append(False)
-                        for _ in range(self.num_dims - 1):
-                            attr.bool_list.values.append(True)
-                        fwd_comm_node.attr.append(attr)
-                        self.add_parent(fwd_comm_node, fwd_comp_node)
-                        layer.fwd_comm_node = fwd_comm_node
-                        encode_message(g, fwd_comm_node)
-
-                    # backward pass
-                    for idx, layer in enumerate(reversed(layers)):
-                        bwd_ig_comp_node = self.get_comp_node(layer.name, "BWD_IG",
-                                                              layer.bwd_ig_comp_time)
-                        if idx == 0:
-                            if fwd_comm_node is None:
-                                raise ValueError("fwd_comm_node is None")
-                            self.add_parent(bwd_ig_comp_node, fwd_comm_node)
-                        else:
-                            self.add_parent(bwd_ig_comp_node, layers[len(layers) - idx].bwd_wg_comp_node)
-                            self.add_parent(bwd_ig_comp_node, layers[len(layers) - idx].bwd_ig_comm_node)
-                        encode_message(g, bwd_ig_comp_node)
-
-                        if idx != num_layers - 1:
-                            bwd_ig_comm_node = self.get_comm_coll_node(layer.name,
-                                                                       layer.bwd_ig_comm_type,
-                                                                       layer.bwd_ig_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            attr.bool_list.values.append(False)
-                            for _ in range(self.num_dims - 1):
-                                attr.bool_list.values.append(True)
-                            bwd_ig_comm_node.attr.append(attr)
-                            self.add_parent(bwd_ig_comm_node, bwd_ig_comp_node)
-                            layer.bwd_ig_comm_node = bwd_ig_comm_node
-                            encode_message(g, bwd_ig_comm_node)
-
-                        bwd_wg_comp_node = self.get_comp_node(layer.name, "BWD_WG",
-                                                              layer.bwd_wg_comp_time)
-                        self.add_parent(bwd_wg_comp_node, bwd_ig_comp_node)
-                        layer.bwd_wg_comp_node = bwd_wg_comp_node
-                        encode_message(g, bwd_wg_comp_node)
-
-                        bwd_wg_comm_node = self.get_comm_coll_node(layer.name,
-                                                                   layer.bwd_wg_comm_type,
-                                                                   layer.bwd_wg_comm_size)
-                        attr = ChakraAttr(name="involved_dim")
-                        attr.bool_list.values.append(True)
-                        for _ in range(self.num_dims - 1):
-                            attr.bool_list.values.append(False)
-                        bwd_wg_comm_node.attr.append(attr)
-                        self.add_parent(bwd_wg_comm_node, bwd_wg_comp_node)
-                        layer.bwd_wg_comm_node = bwd_wg_comm_node
-                        encode_message(g, bwd_wg_comm_node)
-
-                for layer in layers:
-                    layer.bwd_wg_comm_node = None
+        self.write_traces(layers, self.emit_hybrid_model_data)
+
+    def emit_hybrid_model_data(
+        self,
+        g: BytesIO,
+        layers: List[Layer]
+    ) -> None:
+        rev = layers[::-1]
+        fwd_comm_nodes = [None] * len(layers)
+        bwd_wg_comm_nodes = [None] * len(layers)
+        first_dim_attr = self.get_involved_dim_attr([True] + [False] * (self.num_dims - 1))
+        other_dims_attr = self.get_involved_dim_attr([False] + [True] * (self.num_dims - 1))
+        for i in range(self.num_passes):
+            fwd_comm_node = None
+            bwd_ig_comm_node = None
+            bwd_wg_comp_node = None
+
+            # forward pass
+            for idx, layer in enumerate(layers):
+                fwd_comp_node = self.get_comp_node(layer.fwd_comp_node_name,
+                                                   layer.fwd_comp_time)
+                if bwd_wg_comm_nodes[idx] is not None:
+                    self.add_parents(fwd_comp_node, bwd_wg_comm_nodes[idx])
+                if idx != 0:
+                    self.add_parents(fwd_comp_node, fwd_comm_nodes[idx - 1])
+                encode_message(g, fwd_comp_node)
+
+                fwd_comm_node = self.get_comm_coll_node(layer.fwd_comm_node_name,
+                                                        layer.fwd_comm_type_enum,
+                                                        layer.fwd_comm_size)
+                fwd_comm_node.attr.append(other_dims_attr)
+                self.add_parents(fwd_comm_node, fwd_comp_node)
+                fwd_comm_nodes[idx] = fwd_comm_node
+                encode_message(g, fwd_comm_node)
+
+            # backward pass
+            for idx, layer in enumerate(rev):
+                bwd_ig_comp_node = self.get_comp_node(layer.bwd_ig_comp_node_name,
+                                                      layer.bwd_ig_comp_time)
+                if idx == 0:
+                    if fwd_comm_node is None:
+                        raise ValueError("fwd_comm_node is None")
+                    self.add_parents(bwd_ig_comp_node, fwd_comm_node)
+                else:
+                    self.add_parents(bwd_ig_comp_node, bwd_wg_comp_node, bwd_ig_comm_node)
+                encode_message(g, bwd_ig_comp_node)
+
+                if idx != (len(layers) - 1):
+                    bwd_ig_comm_node = self.get_comm_coll_node(layer.bwd_ig_comm_node_name,
+                                                               layer.bwd_ig_comm_type_enum,
+                                                               layer.bwd_ig_comm_size)
+                    bwd_ig_comm_node.attr.append(other_dims_attr)
+                    self.add_parents(bwd_ig_comm_node, bwd_ig_comp_node)
+                    encode_message(g, bwd_ig_comm_node)
+
+                bwd_wg_comp_node = self.get_comp_node(layer.bwd_wg_comp_node_name,
+                                                      layer.bwd_wg_comp_time)
+                self.add_parents(bwd_wg_comp_node, bwd_ig_comp_node)
+                encode_message(g, bwd_wg_comp_node)
+
+                bwd_wg_comm_node = self.get_comm_coll_node(layer.bwd_wg_comm_node_name,
+                                                           layer.bwd_wg_comm_type_enum,
+                                                           layer.bwd_wg_comm_size)
+                bwd_wg_comm_node.attr.append(first_dim_attr)
+                self.add_parents(bwd_wg_comm_node, bwd_wg_comp_node)
+                bwd_wg_comm_nodes[-1 - idx] = bwd_wg_comm_node
+                encode_message(g, bwd_wg_comm_node)
 
     def convert_hybrid_dlrm(
         self,
@@ -647,95 +645,98 @@ class Text2ChakraConverter:
         last_bottom_layer: int
     ) -> None:
         layers = self.get_layers(f, num_layers)
-        for npu_id in range(self.num_npus):
-            output_filename = "%s.%d.et" % (self.output_filename, npu_id)
-            with open(output_filename, "wb") as g:
-                global_metadata = self.get_global_metadata()
-                encode_message(g, global_metadata)
-                for i in range(self.num_passes):
-                    fwd_comp_node = None
-
-                    # forward pass
-                    for idx, layer in enumerate(layers):
-                        fwd_comp_node = self.get_comp_node(layer.name, "FWD",
-                                                           layer.fwd_comp_time)
-                        if layer.bwd_wg_comm_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comm_node)
-                        elif layer.bwd_wg_comp_node is not None:
-                            self.add_parent(fwd_comp_node, layer.bwd_wg_comp_node)
-                        if idx != 0:
-                            self.add_parent(fwd_comp_node, layers[idx - 1].fwd_comp_node)
-                        if idx == last_bottom_layer:
-                            self.add_parent(fwd_comp_node, layers[0].fwd_comm_node)
-                        layer.fwd_comp_node = fwd_comp_node
-                        encode_message(g, fwd_comp_node)
-
-                        if layer.fwd_comm_type == "ALLTOALL":
-                            fwd_comm_node = self.get_comm_coll_node(layer.name,
-                                                                    layer.fwd_comm_type,
-                                                                    layer.fwd_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            for _ in range(self.num_dims):
-                                attr.bool_list.values.append(True)
-                            fwd_comm_node.attr.append(attr)
-                            self.add_parent(fwd_comm_node, fwd_comp_node)
-                            layer.fwd_comm_node = fwd_comm_node
-                            encode_message(g, fwd_comm_node)
-
-                    # backward pass
-                    for idx, layer in enumerate(reversed(layers)):
-                        bwd_wg_comp_node = self.get_comp_node(layer.name, "BWD_WG",
-                                                              layer.bwd_wg_comp_time)
-                        if idx == 0:
-                            if fwd_comp_node is None:
-                                raise ValueError("fwd_comp_node is None")
-                            self.add_parent(bwd_wg_comp_node, fwd_comp_node)
-                        else:
-                            if layers[len(layers) - idx].bwd_ig_comp_node is not None:
-                                self.add_parent(bwd_wg_comp_node,
-                                                layers[len(layers) - idx].bwd_ig_comp_node)
-                            if layers[len(layers) - idx - 1].bwd_ig_comm_node is not None:
-                                self.add_parent(bwd_wg_comp_node,
-                                                layers[len(layers) - idx - 1].bwd_ig_comm_node)
-                        layer.bwd_wg_comp_node = bwd_wg_comp_node
-                        encode_message(g, bwd_wg_comp_node)
-
-                        if layer.bwd_wg_comm_type != "NONE":
-                            bwd_wg_comm_node = self.get_comm_coll_node(layer.name,
-                                                                       layer.bwd_wg_comm_type,
-                                                                       layer.bwd_wg_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            for _ in range(self.num_dims):
-                                attr.bool_list.values.append(True)
-                            bwd_wg_comm_node.attr.append(attr)
-                            self.add_parent(bwd_wg_comm_node, bwd_wg_comp_node)
-                            layer.bwd_wg_comm_node = bwd_wg_comm_node
-                            encode_message(g, bwd_wg_comm_node)
-
-                        bwd_ig_comp_node = None
-                        if idx != (len(layers) - 1):
-                            bwd_ig_comp_node = self.get_comp_node(layer.name, "BWD_IG",
-                                                                  layer.bwd_ig_comp_time)
-                            self.add_parent(bwd_ig_comp_node, bwd_wg_comp_node)
-                            layer.bwd_ig_comp_node = bwd_ig_comp_node
-                            encode_message(g, bwd_ig_comp_node)
-
-                        if (len(layers) - idx - 1) == (last_bottom_layer + 1):
-                            bwd_ig_comm_node = self.get_comm_coll_node(layers[0].name,
-                                                                       layers[0].bwd_ig_comm_type,
-                                                                       layers[0].bwd_ig_comm_size)
-                            attr = ChakraAttr(name="involved_dim")
-                            for _ in range(self.num_dims):
-                                attr.bool_list.values.append(True)
-                            bwd_ig_comm_node.attr.append(attr)
-                            if bwd_ig_comp_node is None:
-                                raise ValueError("bwd_ig_comp_node is None")
-                            self.add_parent(bwd_ig_comm_node, bwd_ig_comp_node)
-                            layers[0].bwd_ig_comm_node = bwd_ig_comm_node
-                            encode_message(g, bwd_ig_comm_node)
-
-                for layer in layers:
-                    layer.bwd_wg_comm_node = None
-                    layer.bwd_wg_comp_node = None
-                    layer.bwd_ig_comm_node = None
-                    layer.bwd_ig_comp_node = None
+        self.write_traces(layers, partial(self.emit_hybrid_dlrm,
+                                          last_bottom_layer=last_bottom_layer))
+
+    def emit_hybrid_dlrm(
+        self,
+        g: BytesIO,
+        layers: List[Layer],
+        last_bottom_layer: int
+    ) -> None:
+        n = len(layers)
+        last_idx = n - 1
+        # the bottom-MLP IG comm node hangs off the IG comp node of the layer
+        # above the last bottom layer, which the first layer never emits
+        if last_bottom_layer == -1 and n > 0:
+            raise ValueError(f"Unsupported last bottom layer {last_bottom_layer}, "
+                             "the first layer has no input gradient node")
+        fwd_comm_nodes: List[Any] = [None] * n
+        # WG node of the previous pass that the forward node of a layer waits on:
+        # the WG comm node when the layer has one, its WG comp node otherwise
+        fwd_comp_parents: List[Any] = [None] * n
+        # comm decisions do not change between passes, so resolve them up front
+        has_fwd_comm = [layer.fwd_comm_type == "ALLTOALL" for layer in layers]
+        has_bwd_wg_comm = [layer.bwd_wg_comm_type != "NONE" for layer in layers]
+        all_dims_attr = self.get_involved_dim_attr([True] * self.num_dims)
+        get_comp_node = self.get_comp_node
+        get_comm_coll_node = self.get_comm_coll_node
+        add_parents = self.add_parents
+        for i in range(self.num_passes):
+            fwd_comp_node = None
+
+            # forward pass
+            for idx, layer in enumerate(layers):
+                prev_fwd_comp_node = fwd_comp_node
+                fwd_comp_node = get_comp_node(layer.fwd_comp_node_name,
+                                              layer.fwd_comp_time)
+                # collect the up to three parent ids and attach them in one extend
+                parent_ids = []
+                if fwd_comp_parents[idx] is not None:
+                    parent_ids.append(fwd_comp_parents[idx].id)
+                if prev_fwd_comp_node is not None:
+                    parent_ids.append(prev_fwd_comp_node.id)
+                if idx == last_bottom_layer:
+                    parent_ids.append(fwd_comm_nodes[0].id)
+                fwd_comp_node.data_deps.extend(parent_ids)
+                encode_message(g, fwd_comp_node)
+
+                if has_fwd_comm[idx]:
+                    fwd_comm_node = get_comm_coll_node(layer.fwd_comm_node_name,
+                                                       layer.fwd_comm_type_enum,
+                                                       layer.fwd_comm_size)
+                    fwd_comm_node.attr.append(all_dims_attr)
+                    add_parents(fwd_comm_node, fwd_comp_node)
+                    fwd_comm_nodes[idx] = fwd_comm_node
+                    encode_message(g, fwd_comm_node)
+
+            # backward pass
+            # the top layer's WG comp node waits on the last forward node, every
+            # other one on the IG comp node of the layer above it
+            bwd_wg_comp_parent = fwd_comp_node
+            bwd_ig_comp_node = None
+            bwd_ig_comm_node = None
+            for idx in range(last_idx, -1, -1):
+                layer = layers[idx]
+                bwd_wg_comp_node = get_comp_node(layer.bwd_wg_comp_node_name,
+                                                 layer.bwd_wg_comp_time)
+                add_parents(bwd_wg_comp_node, bwd_wg_comp_parent)
+                # the bottom-MLP IG comm node only feeds the first layer
+                if idx == 0 and bwd_ig_comm_node is not None:
+                    add_parents(bwd_wg_comp_node, bwd_ig_comm_node)
+                fwd_comp_parents[idx] = bwd_wg_comp_node
+                encode_message(g, bwd_wg_comp_node)
+
+                if has_bwd_wg_comm[idx]:
+                    bwd_wg_comm_node = get_comm_coll_node(layer.bwd_wg_comm_node_name,
+                                                          layer.bwd_wg_comm_type_enum,
+                                                          layer.bwd_wg_comm_size)
+                    bwd_wg_comm_node.attr.append(all_dims_attr)
+                    add_parents(bwd_wg_comm_node, bwd_wg_comp_node)
+                    fwd_comp_parents[idx] = bwd_wg_comm_node
+                    encode_message(g, bwd_wg_comm_node)
+
+                if idx != 0:
+                    bwd_ig_comp_node = get_comp_node(layer.bwd_ig_comp_node_name,
+                                                     layer.bwd_ig_comp_time)
+                    add_parents(bwd_ig_comp_node, bwd_wg_comp_node)
+                    bwd_wg_comp_parent = bwd_ig_comp_node
+                    encode_message(g, bwd_ig_comp_node)
+
+                if idx == last_bottom_layer + 1:
+                    bwd_ig_comm_node = get_comm_coll_node(layers[0].bwd_ig_comm_node_name,
+                                                          layers[0].bwd_ig_comm_type_enum,
+                                                          layers[0].bwd_ig_comm_size)
+                    bwd_ig_comm_node.attr.append(all_dims_attr)
+                    add_parents(bwd_ig_comm_node, bwd_ig_comp_node)
+                    encode_message(g, bwd_ig_comm_node)
@@ -0,0 +1,304 @@
+import logging
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from chakra.et_converter.text2chakra_converter import Layer, Text2ChakraConverter
+from chakra.et_def.et_def_pb2 import COMM_COLL_NODE, COMP_NODE, GlobalMetadata, Node
+from chakra.third_party.utils.protolib import decodeMessage
+
+LAYER_ROWS = [
+    "layer0 -1 41 ALLTOALL 7468 15 ALLGATHER 3525 80 NONE 7682 10",
+    "layer1 -1 85 ALLGATHER 4244 24 NONE 3405 40 ALLTOALL 4036 10",
+]
+
+# the custom parallelism expects a trainable first layer
+CUSTOM_LAYER_ROWS = [
+    "layer0 1 41 ALLTOALL 7468 15 ALLGATHER 3525 80 NONE 7682 10",
+    LAYER_ROWS[1],
+]
+
+
+# (name, type, data_deps) of every node in NPU 0's trace for a 2-layer input
+# converted with 2 passes, one entry per parallelism type
+EXPECTED_NODES = {
+    "MICRO": [
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, []),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, []),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, []),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, []),
+    ],
+    "DATA": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [0]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [1]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [2]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [2]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [4]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [5]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, [6]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [7, 3]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [8]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [9]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [9]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [11]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [12]),
+    ],
+    "MODEL": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [0]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [1]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [2]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [3]),
+        ("COMM_COLL_NODE_layer1_NONE", COMM_COLL_NODE, [4]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [4]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [6, 5]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [7]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, [8]),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [9]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [10, 6]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [11]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [12]),
+        ("COMM_COLL_NODE_layer1_NONE", COMM_COLL_NODE, [13]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [13]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [15, 14]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [16]),
+    ],
+    "HYBRID_DATA_MODEL": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [0]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [1]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [2]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [3]),
+        ("COMM_COLL_NODE_layer1_IG_COMM__NONE", COMM_COLL_NODE, [4]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [4]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [6]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [6, 5]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [8]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [9]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, [10]),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [11]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [7, 12]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [13]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [14]),
+        ("COMM_COLL_NODE_layer1_IG_COMM__NONE", COMM_COLL_NODE, [15]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [15]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [17]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [17, 16]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [19]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [20]),
+    ],
+    "HYBRID_MODEL_DATA": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [0]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [1]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [2]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [3]),
+        ("COMM_COLL_NODE_layer1_NONE", COMM_COLL_NODE, [4]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [4]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [6]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [6, 5]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [8]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [9]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, [10]),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [11]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [7, 12]),
+        ("COMM_COLL_NODE_layer1_ALLGATHER", COMM_COLL_NODE, [13]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [14]),
+        ("COMM_COLL_NODE_layer1_NONE", COMM_COLL_NODE, [15]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [15]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [17]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [17, 16]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [19]),
+        ("COMM_COLL_NODE_layer0_NONE", COMM_COLL_NODE, [20]),
+    ],
+    "CUSTOM": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [0]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [1]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [2]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [4]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [5]),
+        ("COMP_NODE_layer0_BWD_IG", COMP_NODE, [6]),
+    ],
+    "HYBRID_DLRM 1": [
+        ("COMP_NODE_layer0_FWD", COMP_NODE, []),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [0]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [0, 1]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [2]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [3]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [3]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [5]),
+        ("COMP_NODE_layer0_FWD", COMP_NODE, [6]),
+        ("COMM_COLL_NODE_layer0_ALLTOALL", COMM_COLL_NODE, [7]),
+        ("COMP_NODE_layer1_FWD", COMP_NODE, [4, 7, 8]),
+        ("COMP_NODE_layer1_BWD_WG", COMP_NODE, [9]),
+        ("COMM_COLL_NODE_layer1_ALLTOALL", COMM_COLL_NODE, [10]),
+        ("COMP_NODE_layer1_BWD_IG", COMP_NODE, [10]),
+        ("COMP_NODE_layer0_BWD_WG", COMP_NODE, [12]),
+    ],
+}
+
+
+def write_input(tmp_path: Path, header: str, rows: List[str] = LAYER_ROWS) -> Path:
+    """
+    Writes a text converter input with the given header line and layer rows.
+
+    Args:
+        tmp_path (Path): Temporary directory path provided by pytest.
+        header (str): First line of the input, e.g. "HYBRID_DLRM 1".
+        rows (List[str]): Layer rows, two layers by default.
+
+    Returns:
+        Path: Path to the written input file.
+    """
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("\n".join([header, str(len(rows))] + rows) + "\n")
+    return input_file
+
+
+def test_hybrid_dlrm_rejects_last_bottom_layer_minus_one(tmp_path: Path) -> None:
+    """
+    Tests that a HYBRID_DLRM input whose last bottom layer is -1 is rejected
+    before any trace is written.
+    """
+    input_file = write_input(tmp_path, "HYBRID_DLRM -1")
+    output_prefix = tmp_path / "out"
+    converter = Text2ChakraConverter(
+        str(input_file), str(output_prefix), 1, 1, 1, logging.getLogger(__name__)
+    )
+
+    with pytest.raises(ValueError, match="Unsupported last bottom layer -1"):
+        converter.convert()
+    assert not (tmp_path / "out.0.et").exists()
+
+
+def load_layers(tmp_path: Path, body: str, num_layers: int) -> List[Layer]:
+    """
+    Parses a layer table with Text2ChakraConverter.get_layers.
+
+    Args:
+        tmp_path (Path): Temporary directory path provided by pytest.
+        body (str): Layer rows following the two header lines.
+        num_layers (int): Number of layers declared in the header.
+
+    Returns:
+        List[Layer]: Parsed layers.
+    """
+    input_file = tmp_path / "layers.txt"
+    input_file.write_text(f"DATA\n{num_layers}\n{body}")
+    converter = Text2ChakraConverter(
+        str(input_file), str(tmp_path / "out"), 1, 1, 1, logging.getLogger(__name__)
+    )
+    with open(input_file, "r") as f:
+        f.readline()
+        f.readline()
+        return converter.get_layers(f, num_layers)
+
+
+def test_get_layers_skips_blank_rows(tmp_path: Path) -> None:
+    """Tests that blank rows between and after layer rows are ignored."""
+    layers = load_layers(tmp_path, f"\n{LAYER_ROWS[0]}\n   \n{LAYER_ROWS[1]}\n\n", 2)
+
+    assert [layer.name for layer in layers] == ["layer0", "layer1"]
+
+
+def test_get_layers_ignores_trailing_columns(tmp_path: Path) -> None:
+    """Tests that extra columns on a row do not shift the rows after it."""
+    layers = load_layers(tmp_path, f"{LAYER_ROWS[0]} extra\n{LAYER_ROWS[1]}\n", 2)
+
+    assert [layer.name for layer in layers] == ["layer0", "layer1"]
+    assert layers[1].fwd_comp_time == 85
+
+
+def test_get_layers_rejects_missing_rows(tmp_path: Path) -> None:
+    """Tests that a table with fewer rows than declared layers is rejected."""
+    with pytest.raises(ValueError, match="Expected 3 layers, got 2"):
+        load_layers(tmp_path, "\n".join(LAYER_ROWS) + "\n", 3)
+
+
+def test_get_layers_names_malformed_row(tmp_path: Path) -> None:
+    """Tests that a row with missing columns is reported by its content."""
+    with pytest.raises(
+        ValueError, match='Cannot parse the following layer -- "layer0 -1 41"'
+    ):
+        load_layers(tmp_path, f"layer0 -1 41\n{LAYER_ROWS[1]}\n", 2)
+
+
+def test_get_layers_warns_on_extra_rows(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Tests that rows past the declared layer count are dropped with a warning."""
+    with caplog.at_level(logging.WARNING):
+        layers = load_layers(tmp_path, "\n".join(LAYER_ROWS) + "\n", 1)
+
+    assert [layer.name for layer in layers] == ["layer0"]
+    assert "Ignoring 1 rows past the 1 declared layers" in caplog.text
+
+
+def load_nodes(trace_file: Path) -> List[Node]:
+    """
+    Decodes the nodes of a Chakra trace, skipping its global metadata.
+
+    Args:
+        trace_file (Path): Path to the .et trace file.
+
+    Returns:
+        List[Node]: Nodes in file order.
+    """
+    nodes = []
+    with open(trace_file, "rb") as f:
+        decodeMessage(f, GlobalMetadata())
+        node = Node()
+        while decodeMessage(f, node):
+            nodes.append(node)
+            node = Node()
+    return nodes
+
+
+@pytest.mark.parametrize("header", ["DATA", "HYBRID_DLRM 1"])
+def test_npu_traces_are_identical_and_self_contained(
+    tmp_path: Path, header: str
+) -> None:
+    """
+    Tests that every NPU gets a byte-identical trace whose data dependencies
+    all point at nodes of that same trace.
+    """
+    input_file = write_input(tmp_path, header)
+    converter = Text2ChakraConverter(
+        str(input_file), str(tmp_path / "out"), 1, 3, 2, logging.getLogger(__name__)
+    )
+
+    converter.convert()
+
+    first_trace = (tmp_path / "out.0.et").read_bytes()
+    assert (tmp_path / "out.1.et").read_bytes() == first_trace
+    assert (tmp_path / "out.2.et").read_bytes() == first_trace
+    for npu_id in range(3):
+        nodes = load_nodes(tmp_path / f"out.{npu_id}.et")
+        node_ids = {node.id for node in nodes}
+        assert nodes
+        assert all(dep in node_ids for node in nodes for dep in node.data_deps)
+
+
+@pytest.mark.parametrize("header", list(EXPECTED_NODES))
+def test_trace_structure(tmp_path: Path, header: str) -> None:
+    """
+    Tests the node names, types and data dependencies each parallelism type
+    emits for a 2-layer input over 2 passes.
+    """
+    rows = CUSTOM_LAYER_ROWS if header == "CUSTOM" else LAYER_ROWS
+    input_file = write_input(tmp_path, header, rows)
+    converter = Text2ChakraConverter(
+        str(input_file), str(tmp_path / "out"), 1, 1, 2, logging.getLogger(__name__)
+    )
+
+    converter.convert()
+
+    nodes = load_nodes(tmp_path / "out.0.et")
+    assert [node.id for node in nodes] == list(range(len(nodes)))
+    assert [
+        (node.name, node.type, list(node.data_deps)) for node in nodes
+    ] == EXPECTED_NODES[header]
@@ -146,13 +146,15 @@ def _EncodeVarint32(out_file, value):
   google.protobuf.internal.encoder and is only repeated here to
   avoid depending on the internal functions in the library.
   """
+  out = bytearray()
   bits = value & 0x7f
   value >>= 7
   while value:
-    out_file.write(struct.pack('<B', 0x80 | bits))
+    out.append(0x80 | bits)
     bits = value & 0x7f
     value >>= 7
-  out_file.write(struct.pack('<B', bits))
+  out.append(bits)
+  out_file.write(out)
 
 def encodeMessage(out_file, message):
     """